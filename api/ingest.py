@@ -1,12 +1,12 @@
 import asyncio
 from typing import Dict
 
-import aiohttp
 from fastapi import APIRouter
 
 from models.ingest import RequestPayload
 from service.embedding import EmbeddingService
 from service.ingest import handle_google_drive, handle_urls
+from utils.http_client import http_client
 from utils.summarise import SUMMARY_SUFFIX
 
 router = APIRouter()
@@ -20,6 +20,7 @@ async def ingest(payload: RequestPayload) -> Dict:
         index_name=payload.index_name,
         vector_credentials=payload.vector_database,
         dimensions=payload.document_processor.encoder.dimensions,
+        encoder_precision=payload.document_processor.encoder.precision,
     )
     chunks = []
     summary_documents = []
@@ -53,10 +54,9 @@ async def ingest(payload: RequestPayload) -> Dict:
     await asyncio.gather(*tasks)
 
     if payload.webhook_url:
-        async with aiohttp.ClientSession() as session:
-            await session.post(
-                url=payload.webhook_url,
-                json={"index_name": payload.index_name, "status": "completed"},
-            )
+        await http_client.post(
+            url=payload.webhook_url,
+            json={"index_name": payload.index_name, "status": "completed"},
+        )
 
     return {"success": True, "index_name": payload.index_name}
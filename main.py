@@ -4,6 +4,8 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from router import router
+from utils.http_client import http_client
+from vectordbs.qdrant import close_clients as close_qdrant_clients
 
 load_dotenv()
 
@@ -24,3 +26,6 @@ app.add_middleware(
 )
 
 app.include_router(router)
+
+app.add_event_handler("shutdown", http_client.aclose)
+app.add_event_handler("shutdown", close_qdrant_clients)
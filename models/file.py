@@ -1,4 +1,5 @@
 from enum import Enum
+from types import MappingProxyType
 from urllib.parse import unquote, urlparse
 
 from pydantic import BaseModel
@@ -16,18 +17,25 @@ class FileType(Enum):
     json = "JSON"
 
     def suffix(self) -> str:
-        suffixes = {
-            "TXT": ".txt",
-            "PDF": ".pdf",
-            "MARKDOWN": ".md",
-            "DOCX": ".docx",
-            "CSV": ".csv",
-            "XLSX": ".xlsx",
-            "PPTX": ".pptx",
-            "HTML": ".html",
-            "JSON": ".json",
-        }
-        return suffixes[self.value]
+        suffix = _SUFFIXES.get(self.value)
+        if suffix is None:
+            raise ValueError(f"No suffix defined for file type: {self.value}")
+        return suffix
+
+
+_SUFFIXES = MappingProxyType(
+    {
+        "TXT": ".txt",
+        "PDF": ".pdf",
+        "MARKDOWN": ".md",
+        "DOCX": ".docx",
+        "CSV": ".csv",
+        "XLSX": ".xlsx",
+        "PPTX": ".pptx",
+        "HTML": ".html",
+        "JSON": ".json",
+    }
+)
 
 
 class File(BaseModel):
@@ -1,4 +1,5 @@
 from enum import Enum
+from functools import lru_cache
 from typing import List, Literal, Optional
 
 from pydantic import BaseModel, Field
@@ -23,6 +24,11 @@ class EncoderConfig(BaseModel):
         description="Model name for the encoder",
     )
     dimensions: int = Field(default=384, description="Dimension of the encoder output")
+    precision: Literal["float32", "int8"] = Field(
+        default="float32",
+        description="Vector storage precision, `int8` enables scalar quantization "
+        "on new indexes, only for `qdrant`",
+    )
 
     _encoder_config = {
         EncoderProvider.cohere: {
@@ -42,8 +48,13 @@ class EncoderConfig(BaseModel):
         if not config:
             raise ValueError(f"Encoder '{self.provider}' not found.")
         model_name = self.model_name or config["default_model_name"]
-        encoder_class = config["class"]
-        return encoder_class(name=model_name)
+        return _get_encoder(encoder_class=config["class"], model_name=model_name)
+
+
+# One instance per encoder class and model, shared across requests
+@lru_cache(maxsize=None)
+def _get_encoder(*, encoder_class: type, model_name: str) -> BaseEncoder:
+    return encoder_class(name=model_name)
 
 
 class UnstructuredConfig(BaseModel):
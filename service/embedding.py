@@ -1,34 +1,60 @@
 import asyncio
-import copy
+import io
+import os
 import uuid
-from tempfile import NamedTemporaryFile
-from typing import Any, List, Literal, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Literal, Optional, Tuple
+from urllib.parse import unquote, urlparse
 
 import numpy as np
-import requests
 import tiktoken
 from decouple import config
+from pypdf import PdfReader, PdfWriter
 from semantic_router.encoders import (
     BaseEncoder,
 )
 from tqdm import tqdm
+from tqdm.asyncio import tqdm as atqdm
 from unstructured_client import UnstructuredClient
 from unstructured_client.models import shared
 from unstructured_client.models.errors import SDKError
 
 from models.document import BaseDocument, BaseDocumentChunk
-from models.file import File
+from models.file import File, FileType
 from models.google_drive import GoogleDrive
 from models.ingest import DocumentProcessorConfig
 from service.splitter import UnstructuredSemanticSplitter
+from utils.embedding_cache import EmbeddingCache
+from utils.http_client import http_client
 from utils.logger import logger
 from utils.summarise import completion
-from vectordbs import get_vector_service
+from vectordbs import BaseVectorDatabase, get_vector_service
 
 # TODO: Add similarity score to the BaseDocumentChunk
 # TODO: Add relevance score to the BaseDocumentChunk
 # TODO: Add created_at date to the BaseDocumentChunk
 
+EMBEDDING_BATCH_SIZE = config("EMBEDDING_BATCH_SIZE", default=100, cast=int)
+EMBEDDING_CONCURRENCY = config("EMBEDDING_CONCURRENCY", default=10, cast=int)
+# Divides the embedding batch size, so batches aren't re-sliced unevenly
+UPSERT_BATCH_SIZE = config("UPSERT_BATCH_SIZE", default=50, cast=int)
+UPSERT_CONCURRENCY = config("UPSERT_CONCURRENCY", default=4, cast=int)
+EMBEDDING_CACHE_SIZE = config("EMBEDDING_CACHE_SIZE", default=10000, cast=int)
+SUMMARY_CONCURRENCY = config("SUMMARY_CONCURRENCY", default=10, cast=int)
+FILE_CONCURRENCY = config("FILE_CONCURRENCY", default=8, cast=int)
+# PDFs longer than this are partitioned in concurrent page ranges of this size
+PDF_SPLIT_PAGE_COUNT = config("PDF_SPLIT_PAGE_COUNT", default=20, cast=int)
+PDF_SPLIT_CONCURRENCY = config("PDF_SPLIT_CONCURRENCY", default=4, cast=int)
+
+# Sized for every file partitioning all of its page ranges at once
+partition_executor = ThreadPoolExecutor(
+    max_workers=FILE_CONCURRENCY * PDF_SPLIT_CONCURRENCY,
+    thread_name_prefix="partition",
+)
+
+# Shared across requests so re-ingested texts skip the encoder
+embedding_cache = EmbeddingCache(max_size=EMBEDDING_CACHE_SIZE)
+
 
 class EmbeddingService:
     def __init__(
@@ -39,6 +65,7 @@ class EmbeddingService:
         dimensions: Optional[int],
         files: Optional[List[File]] = None,
         google_drive: Optional[GoogleDrive] = None,
+        encoder_precision: str = "float32",
     ):
         self.encoder = encoder
         self.files = files
@@ -46,6 +73,7 @@ class EmbeddingService:
         self.index_name = index_name
         self.vector_credentials = vector_credentials
         self.dimensions = dimensions
+        self.encoder_precision = encoder_precision
         self.unstructured_client = UnstructuredClient(
             api_key_auth=config("UNSTRUCTURED_IO_API_KEY"),
             server_url=config("UNSTRUCTURED_IO_SERVER_URL"),
@@ -81,45 +109,152 @@ class EmbeddingService:
             f"Downloading and extracting elements from {file.url}, "
             f"using `{strategy}` strategy"
         )
-        with NamedTemporaryFile(suffix=file.suffix, delete=True) as temp_file:
-            with requests.get(url=file.url) as response:
-                temp_file.write(response.content)
-                temp_file.flush()
-                temp_file.seek(0)  # Reset file pointer to the beginning
-                file_content = temp_file.read()
-                file_name = temp_file.name
-
-            files = shared.Files(
-                content=file_content,
-                file_name=file_name,
-            )
-            if returned_elements_type == "original":
-                req = shared.PartitionParameters(
-                    files=files,
-                    include_page_breaks=True,
+        # The API only needs the bytes and a file name with the right extension,
+        # so keep the download in memory instead of round-tripping through disk
+        response = await http_client.get(file.url)
+        file_content = response.content
+        file_path = unquote(urlparse(file.url).path)
+        file_stem, _ = os.path.splitext(os.path.basename(file_path))
+        file_name = f"{file_stem}{file.suffix}"
+
+        if file.type == FileType.pdf:
+            # pypdf parsing is CPU bound, keep it off the event loop
+            pdf_splits = await asyncio.to_thread(self._split_pdf, file_content)
+            if len(pdf_splits) > 1:
+                return await self._partition_pdf_splits(
+                    file,
+                    pdf_splits=pdf_splits,
+                    file_name=file_name,
                     strategy=strategy,
+                    returned_elements_type=returned_elements_type,
                 )
-            else:
-                req = shared.PartitionParameters(
-                    files=files,
-                    include_page_breaks=True,
+        return await self._partition_content(
+            file,
+            file_content=file_content,
+            file_name=file_name,
+            strategy=strategy,
+            returned_elements_type=returned_elements_type,
+        )
+
+    @staticmethod
+    def _split_pdf(file_content: bytes) -> List[Tuple[int, bytes]]:
+        """
+        Splits a PDF into ranges of `PDF_SPLIT_PAGE_COUNT` pages.
+        Returns a list of (page offset, PDF bytes), a single item for small PDFs.
+        """
+        try:
+            reader = PdfReader(io.BytesIO(file_content))
+            num_pages = len(reader.pages)
+            if num_pages <= PDF_SPLIT_PAGE_COUNT:
+                return [(0, file_content)]
+
+            pdf_splits = []
+            for page_offset in range(0, num_pages, PDF_SPLIT_PAGE_COUNT):
+                writer = PdfWriter()
+                pages = reader.pages[page_offset : page_offset + PDF_SPLIT_PAGE_COUNT]
+                for page in pages:
+                    writer.add_page(page)
+                buffer = io.BytesIO()
+                writer.write(buffer)
+                pdf_splits.append((page_offset, buffer.getvalue()))
+            return pdf_splits
+        except Exception as e:
+            # pypdf raises a range of errors on malformed files, not only PdfReadError
+            logger.warning(f"Could not split PDF pages, partitioning as a whole: {e}")
+            return [(0, file_content)]
+
+    async def _partition_pdf_splits(
+        self,
+        file: File,
+        pdf_splits: List[Tuple[int, bytes]],
+        file_name: str,
+        strategy: str,
+        returned_elements_type: Literal["chunked", "original"],
+    ) -> List[Any]:
+        """
+        Partitions the page ranges of a PDF concurrently.
+        Returns the elements in page order, with page numbers of the whole file.
+        """
+        sem = asyncio.Semaphore(PDF_SPLIT_CONCURRENCY)
+
+        async def partition_split(page_offset: int, split_content: bytes) -> List[Any]:
+            async with sem:
+                elements = await self._partition_content(
+                    file,
+                    file_content=split_content,
+                    file_name=file_name,
                     strategy=strategy,
-                    max_characters=2500,
-                    new_after_n_chars=1000,
-                    chunking_strategy="by_title",
+                    returned_elements_type=returned_elements_type,
+                )
+            for element in elements:
+                metadata = element.get("metadata") or {}
+                if metadata.get("page_number") is not None:
+                    metadata["page_number"] += page_offset
+            return elements
+
+        logger.info(f"Partitioning {file.url} in {len(pdf_splits)} page ranges")
+        # Explicit tasks, so sibling page ranges are cancelled if one fails
+        tasks = [
+            asyncio.create_task(partition_split(page_offset, split_content))
+            for page_offset, split_content in pdf_splits
+        ]
+        try:
+            splits_elements = await asyncio.gather(*tasks)
+        except Exception:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        return [element for elements in splits_elements for element in elements]
+
+    async def _partition_content(
+        self,
+        file: File,
+        file_content: bytes,
+        file_name: str,
+        strategy: str,
+        returned_elements_type: Literal["chunked", "original"],
+    ) -> List[Any]:
+        """
+        Sends the file content to the Unstructured API.
+        Returns a list of unstructured elements.
+        """
+        files = shared.Files(
+            content=file_content,
+            file_name=file_name,
+        )
+        if returned_elements_type == "original":
+            req = shared.PartitionParameters(
+                files=files,
+                include_page_breaks=True,
+                strategy=strategy,
+            )
+        else:
+            req = shared.PartitionParameters(
+                files=files,
+                include_page_breaks=True,
+                strategy=strategy,
+                max_characters=2500,
+                new_after_n_chars=1000,
+                chunking_strategy="by_title",
+            )
+        try:
+            # The SDK call is blocking and can run for minutes, use the dedicated
+            # pool so it doesn't starve the default executor
+            loop = asyncio.get_running_loop()
+            unstructured_response = await loop.run_in_executor(
+                partition_executor, self.unstructured_client.general.partition, req
+            )
+            if unstructured_response.elements is not None:
+                return unstructured_response.elements
+            else:
+                logger.error(
+                    f"Error partitioning file {file.url}: {unstructured_response}"
                 )
-            try:
-                unstructured_response = self.unstructured_client.general.partition(req)
-                if unstructured_response.elements is not None:
-                    return unstructured_response.elements
-                else:
-                    logger.error(
-                        f"Error partitioning file {file.url}: {unstructured_response}"
-                    )
-                    return []
-            except SDKError as e:
-                logger.error(f"Error partitioning file {file.url}: {e}")
                 return []
+        except SDKError as e:
+            logger.error(f"Error partitioning file {file.url}: {e}")
+            return []
 
     def _tiktoken_length(self, text: str):
         tokenizer = tiktoken.get_encoding("cl100k_base")
@@ -150,182 +285,270 @@ class EmbeddingService:
 
         return {key: sanitize_value(value) for key, value in metadata.items()}
 
-    async def generate_chunks(
+    async def _generate_file_chunks(
         self,
+        file: File,
         config: DocumentProcessorConfig,
     ) -> List[BaseDocumentChunk]:
-        doc_chunks = []
-        for file in tqdm(self.files, desc="Generating chunks"):
-            logger.info(f"Splitting method: {config.splitter.name}")
-            try:
-                chunks = []
-                if config.splitter.name == "by_title":
-                    chunked_elements = await self._partition_file(
-                        file, strategy=config.unstructured.partition_strategy
-                    )
-                    # TODO: handle chunked_elements being None
-                    for element in chunked_elements:
-                        chunk_data = {
-                            "content": element.get("text"),
-                            "metadata": self._sanitize_metadata(
-                                element.get("metadata")
-                            ),
-                        }
-                        chunks.append(chunk_data)
-                if config.splitter.name == "semantic":
-                    elements = await self._partition_file(
-                        file,
-                        strategy=config.unstructured.partition_strategy,
-                        returned_elements_type="original",
-                    )
-                    splitter_config = UnstructuredSemanticSplitter(
-                        encoder=self.encoder,
-                        window_size=config.splitter.rolling_window_size,
-                        min_split_tokens=config.splitter.min_tokens,
-                        max_split_tokens=config.splitter.max_tokens,
-                    )
-                    chunks = await splitter_config(elements=elements)
-
-                if not chunks:
-                    continue
+        logger.info(f"Splitting method: {config.splitter.name}")
+        try:
+            doc_chunks = []
+            chunks = []
+            if config.splitter.name == "by_title":
+                chunked_elements = await self._partition_file(
+                    file, strategy=config.unstructured.partition_strategy
+                )
+                # TODO: handle chunked_elements being None
+                for element in chunked_elements:
+                    chunk_data = {
+                        "content": element.get("text"),
+                        "metadata": self._sanitize_metadata(element.get("metadata")),
+                    }
+                    chunks.append(chunk_data)
+            if config.splitter.name == "semantic":
+                elements = await self._partition_file(
+                    file,
+                    strategy=config.unstructured.partition_strategy,
+                    returned_elements_type="original",
+                )
+                splitter_config = UnstructuredSemanticSplitter(
+                    encoder=self.encoder,
+                    window_size=config.splitter.rolling_window_size,
+                    min_split_tokens=config.splitter.min_tokens,
+                    max_split_tokens=config.splitter.max_tokens,
+                )
+                chunks = await splitter_config(elements=elements)
 
-                document_id = f"doc_{uuid.uuid4()}"
-                document_content = ""
-                for chunk in chunks:
-                    document_content += chunk.get("content", "")
-                    chunk_id = str(uuid.uuid4())
+            if not chunks:
+                return []
 
-                    if config.splitter.prefix_title:
-                        content = (
-                            f"{chunk.get('title', '')}\n{chunk.get('content', '')}"
-                        )
-                    else:
-                        content = chunk.get("content", "")
-                    doc_chunk = BaseDocumentChunk(
-                        id=chunk_id,
-                        doc_url=file.url,
-                        document_id=document_id,
-                        content=content,
-                        source=file.url,
-                        source_type=file.suffix,
-                        chunk_index=chunk.get("chunk_index", None),
-                        title=chunk.get("title", None),
-                        token_count=self._tiktoken_length(chunk.get("content", "")),
-                        metadata=self._sanitize_metadata(chunk.get("metadata", {})),
-                    )
-                    doc_chunks.append(doc_chunk)
+            document_id = f"doc_{uuid.uuid4()}"
+            # Resolved once per file, `File.suffix` parses the URL on every access
+            file_suffix = file.suffix
+            document_content = ""
+            for chunk in chunks:
+                document_content += chunk.get("content", "")
+                chunk_id = str(uuid.uuid4())
 
-                # This object will be used for evaluation purposes
-                BaseDocument(
-                    id=document_id,
-                    content=document_content,
+                if config.splitter.prefix_title:
+                    content = f"{chunk.get('title', '')}\n{chunk.get('content', '')}"
+                else:
+                    content = chunk.get("content", "")
+                doc_chunk = BaseDocumentChunk(
+                    id=chunk_id,
                     doc_url=file.url,
-                    metadata={
-                        "source": file.url,
-                        "source_type": "document",
-                        "document_type": file.suffix,
-                    },
+                    document_id=document_id,
+                    content=content,
+                    source=file.url,
+                    source_type=file_suffix,
+                    chunk_index=chunk.get("chunk_index", None),
+                    title=chunk.get("title", None),
+                    token_count=self._tiktoken_length(chunk.get("content", "")),
+                    metadata=self._sanitize_metadata(chunk.get("metadata", {})),
                 )
+                doc_chunks.append(doc_chunk)
+
+            # This object will be used for evaluation purposes
+            BaseDocument(
+                id=document_id,
+                content=document_content,
+                doc_url=file.url,
+                metadata={
+                    "source": file.url,
+                    "source_type": "document",
+                    "document_type": file_suffix,
+                },
+            )
+            return doc_chunks
+
+        except Exception as e:
+            logger.error(f"Error loading chunks from {file.url}: {e}")
+            raise
+
+    async def generate_chunks(
+        self,
+        config: DocumentProcessorConfig,
+    ) -> List[BaseDocumentChunk]:
+        pbar = tqdm(total=len(self.files), desc="Generating chunks")
+        sem = asyncio.Semaphore(FILE_CONCURRENCY)
+
+        async def safe_generate_file_chunks(file: File) -> List[BaseDocumentChunk]:
+            async with sem:
+                file_chunks = await self._generate_file_chunks(file=file, config=config)
+                pbar.update()
+                return file_chunks
+
+        # Explicit tasks, so the remaining files are cancelled if one fails
+        tasks = [
+            asyncio.create_task(safe_generate_file_chunks(file)) for file in self.files
+        ]
+        try:
+            files_chunks = await asyncio.gather(*tasks)
+        except Exception:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        finally:
+            pbar.close()
+
+        # Flatten while preserving the order of the files
+        return [chunk for file_chunks in files_chunks for chunk in file_chunks]
 
+    async def _cached_encode(
+        self, encoder: BaseEncoder, texts: List[str]
+    ) -> np.ndarray:
+        keys = [
+            embedding_cache.key(
+                encoder_name=encoder.name, dimensions=self.dimensions, text=text
+            )
+            for text in texts
+        ]
+        embeddings = embedding_cache.get_many(keys)
+        # Repeated texts (headers, footers) are encoded once per batch
+        misses: Dict[str, List[int]] = {}
+        for i, embedding in enumerate(embeddings):
+            if embedding is None:
+                misses.setdefault(texts[i], []).append(i)
+        if misses:
+            # Encoders are sync, run them off the event loop
+            encoded = await asyncio.to_thread(encoder, list(misses))
+            # One contiguous (batch, dimensions) array instead of per-row
+            encoded = np.asarray(encoded, dtype=np.float32)
+            for indices, embedding in zip(misses.values(), encoded):
+                for i in indices:
+                    embeddings[i] = embedding
+            embedding_cache.set_many(
+                {keys[i]: embeddings[i] for i, *_ in misses.values()}
+            )
+        return np.stack(embeddings)
+
+    async def _upsert_worker(
+        self, vector_service: BaseVectorDatabase, queue: asyncio.Queue
+    ) -> None:
+        # Drain embedded batches until the producer sends the `None` sentinel
+        while (batch := await queue.get()) is not None:
+            chunks_batch, embeddings_batch = batch
+            try:
+                await vector_service.upsert(
+                    chunks=chunks_batch, embeddings=embeddings_batch
+                )
             except Exception as e:
-                logger.error(f"Error loading chunks from {file.url}: {e}")
+                logger.error(f"Error upserting embeddings: {e}")
                 raise
-        return doc_chunks
 
     async def embed_and_upsert(
         self,
         chunks: List[BaseDocumentChunk],
         encoder: BaseEncoder,
         index_name: Optional[str] = None,
-        batch_size: int = 100,
+        batch_size: Optional[int] = None,
     ) -> List[BaseDocumentChunk]:
+        batch_size = batch_size or EMBEDDING_BATCH_SIZE
+        vector_service = get_vector_service(
+            index_name=index_name or self.index_name,
+            credentials=self.vector_credentials,
+            encoder=encoder,
+            dimensions=self.dimensions,
+            precision=self.encoder_precision,
+        )
         pbar = tqdm(total=len(chunks), desc="Generating embeddings")
-        sem = asyncio.Semaphore(10)  # Limit to 10 concurrent tasks
+        sem = asyncio.Semaphore(EMBEDDING_CONCURRENCY)
+        # Bounded, so encoding pauses when upserts fall behind
+        queue: asyncio.Queue = asyncio.Queue(maxsize=2 * UPSERT_CONCURRENCY)
 
         async def embed_batch(
             chunks_batch: List[BaseDocumentChunk],
         ) -> List[BaseDocumentChunk]:
             async with sem:
                 try:
-                    chunk_texts = []
+                    # Filter once, so texts and embeddings stay aligned
+                    valid_chunks = []
                     for chunk in chunks_batch:
-                        if not chunk:
+                        if not chunk or not chunk.content.strip():
                             logger.warning("Empty chunk encountered")
                             continue
-                        chunk_texts.append(chunk.content)
+                        valid_chunks.append(chunk)
 
-                    if not chunk_texts:
+                    if not valid_chunks:
                         logger.warning(f"No content to embed in batch {chunks_batch}")
                         return []
-                    embeddings = encoder(chunk_texts)
-                    for chunk, embedding in zip(chunks_batch, embeddings):
-                        chunk.dense_embedding = np.array(embedding).tolist()
+                    # Kept as one (batch, dimensions) array down to the adapters
+                    embeddings = await self._cached_encode(
+                        encoder, [chunk.content for chunk in valid_chunks]
+                    )
                     pbar.update(len(chunks_batch))  # Update the progress bar
-                    return chunks_batch
                 except Exception as e:
                     logger.error(f"Error embedding a batch of documents: {e}")
                     raise
+            # Hand over to the upsert workers while the next batches encode
+            for i in range(0, len(valid_chunks), UPSERT_BATCH_SIZE):
+                await queue.put(
+                    (
+                        valid_chunks[i : i + UPSERT_BATCH_SIZE],
+                        embeddings[i : i + UPSERT_BATCH_SIZE],
+                    )
+                )
+            return valid_chunks
 
-        # Create batches of chunks
         chunks_batches = [
             chunks[i : i + batch_size] for i in range(0, len(chunks), batch_size)
         ]
-
-        # Process each batch
-        tasks = [embed_batch(batch) for batch in chunks_batches]
-        chunks_with_embeddings = await asyncio.gather(*tasks)
-        chunks_with_embeddings = [
-            chunk
-            for batch in chunks_with_embeddings
-            for chunk in batch
-            if chunk is not None
+        # Explicit tasks, so they can be cancelled if any batch or upsert fails
+        embed_tasks = [
+            asyncio.create_task(embed_batch(batch)) for batch in chunks_batches
         ]
-        pbar.close()
 
-        vector_service = get_vector_service(
-            index_name=index_name or self.index_name,
-            credentials=self.vector_credentials,
-            encoder=encoder,
-            dimensions=self.dimensions,
-        )
+        async def produce() -> List[List[BaseDocumentChunk]]:
+            results = await asyncio.gather(*embed_tasks)
+            for _ in range(UPSERT_CONCURRENCY):
+                await queue.put(None)
+            return results
+
+        producer = asyncio.create_task(produce())
+        workers = [
+            asyncio.create_task(self._upsert_worker(vector_service, queue))
+            for _ in range(UPSERT_CONCURRENCY)
+        ]
         try:
-            await vector_service.upsert(chunks=chunks_with_embeddings)
-        except Exception as e:
-            logger.error(f"Error upserting embeddings: {e}")
+            embedded_chunks, *_ = await asyncio.gather(producer, *workers)
+        except Exception:
+            tasks = [*embed_tasks, producer, *workers]
+            for task in tasks:
+                task.cancel()
+            # Wait for the cancellations, nothing is left blocked on the queue
+            await asyncio.gather(*tasks, return_exceptions=True)
             raise
+        finally:
+            pbar.close()
 
-        return chunks_with_embeddings
+        return [chunk for batch in embedded_chunks for chunk in batch]
 
     async def generate_summary_documents(
         self, documents: List[BaseDocumentChunk]
     ) -> List[BaseDocumentChunk]:
-        pbar = tqdm(total=len(documents), desc="Grouping chunks")
         pages = {}
-        for document in documents:
+        for document in tqdm(documents, desc="Grouping chunks"):
             page_number = document.metadata.get("page_number", None)
             if page_number not in pages:
-                pages[page_number] = copy.deepcopy(document)
+                # Shallow copy, the metadata is never mutated downstream
+                pages[page_number] = document.model_copy()
             else:
                 pages[page_number].content += document.content
-            pbar.update()
-        pbar.close()
 
-        # Limit to 10 concurrent jobs
-        sem = asyncio.Semaphore(10)
+        sem = asyncio.Semaphore(SUMMARY_CONCURRENCY)
 
         async def safe_completion(document: BaseDocumentChunk) -> BaseDocumentChunk:
             async with sem:
                 try:
                     document.content = await completion(document=document)
-                    pbar.update()
                     return document
                 except Exception as e:
                     logger.error(f"Error summarizing document {document.id}: {e}")
                     return None
 
-        pbar = tqdm(total=len(pages), desc="Summarizing documents")
         tasks = [safe_completion(document) for document in pages.values()]
-        summary_documents = await asyncio.gather(*tasks, return_exceptions=False)
-        pbar.close()
+        # Progress is tracked as tasks finish, results keep the pages order
+        summary_documents = await atqdm.gather(*tasks, desc="Summarizing documents")
 
         return summary_documents
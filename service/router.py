@@ -1,3 +1,7 @@
+import asyncio
+import re
+from functools import lru_cache
+from typing import Optional
 from uuid import uuid4
 
 from decouple import config
@@ -18,7 +22,23 @@ STRUCTURED_DATA = [
     "application/json",
 ]
 
+SUMMARY_PATTERN = re.compile(r"\b(summari[sz]e|tl;?dr|overview)\b", re.IGNORECASE)
 
+
+def _fast_route(text: str) -> Optional[str]:
+    """
+    Returns the route for inputs that obviously ask for a summary.
+    This knowingly widens summary routing: any input mentioning these words
+    skips the route layer's `score_threshold`, and `overview` is not one of
+    its utterances.
+    """
+    if SUMMARY_PATTERN.search(text):
+        return "summarize"
+    return None
+
+
+# Built once per process, route utterances are only encoded on first use
+@lru_cache(maxsize=1)
 def create_route_layer() -> RouteLayer:
     routes = [
         Route(
@@ -70,8 +90,11 @@ async def get_documents(
 
 
 async def query(payload: RequestPayload) -> list[BaseDocumentChunk]:
-    rl = create_route_layer()
-    decision = rl(payload.input).name
+    decision = _fast_route(payload.input)
+    if decision is None:
+        # Semantic routing encodes the input, keep it off the event loop
+        rl = create_route_layer()
+        decision = (await asyncio.to_thread(rl, payload.input)).name
     encoder = payload.encoder.get_encoder()
 
     if decision == "summarize":
@@ -1,3 +1,4 @@
+import asyncio
 import re
 from typing import Any
 
@@ -157,7 +158,9 @@ class UnstructuredSemanticSplitter:
                 if element.get("type") == "Table":
                     # Process accumulated text before the table
                     if accumulated_element_texts:
-                        splits = splitter(accumulated_element_texts)
+                        splits = await asyncio.to_thread(
+                            splitter, accumulated_element_texts
+                        )
                         for split in splits:
                             _append_chunks(
                                 title=title,
@@ -195,7 +198,7 @@ class UnstructuredSemanticSplitter:
             # or if no table was encountered
 
             if accumulated_element_texts:
-                splits = splitter(accumulated_element_texts)
+                splits = await asyncio.to_thread(splitter, accumulated_element_texts)
                 for split in splits:
                     _append_chunks(
                         title=title,
@@ -0,0 +1,40 @@
+import hashlib
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+class EmbeddingCache:
+    """
+    In-memory LRU cache of embeddings, keyed by encoder and content hash.
+    A `max_size` of 0 disables the cache.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._cache: OrderedDict[str, np.ndarray] = OrderedDict()
+
+    @staticmethod
+    def key(*, encoder_name: str, dimensions: Optional[int], text: str) -> str:
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"emb:{encoder_name}:{dimensions}:{digest}"
+
+    def get_many(self, keys: List[str]) -> List[Optional[np.ndarray]]:
+        values = []
+        for key in keys:
+            value = self._cache.get(key)
+            if value is not None:
+                self._cache.move_to_end(key)
+            values.append(value)
+        return values
+
+    def set_many(self, items: Dict[str, np.ndarray]) -> None:
+        if not self.max_size:
+            return
+        for key, value in items.items():
+            # Copy, a row view would keep its whole batch array alive
+            self._cache[key] = np.array(value, copy=True)
+            self._cache.move_to_end(key)
+        while len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
@@ -0,0 +1,10 @@
+import httpx
+
+# Shared across the service, so downloads from the same host reuse pooled
+# connections (and HTTP/2 streams) instead of a new TLS handshake per file
+http_client = httpx.AsyncClient(
+    http2=True,
+    follow_redirects=True,
+    timeout=httpx.Timeout(30.0),
+    limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+)
@@ -1,10 +1,12 @@
 from typing import Optional
 
 from dotenv import load_dotenv
+from qdrant_client.http import models as rest
 from semantic_router.encoders import BaseEncoder
 from semantic_router.encoders.openai import OpenAIEncoder
 
 from models.vector_database import VectorDatabase
+from utils.logger import logger
 from vectordbs.astra import AstraService
 from vectordbs.base import BaseVectorDatabase
 from vectordbs.pinecone import PineconeService
@@ -20,6 +22,7 @@ def get_vector_service(
     credentials: VectorDatabase,
     encoder: BaseEncoder = OpenAIEncoder(),
     dimensions: Optional[int] = 384,
+    precision: str = "float32",
 ) -> BaseVectorDatabase:
     services = {
         "pinecone": PineconeService,
@@ -34,9 +37,24 @@ def get_vector_service(
     if service is None:
         raise ValueError(f"Unsupported provider: {credentials.type.value}")
 
+    kwargs = {}
+    if precision == "int8":
+        if service is QdrantService:
+            kwargs["quantization_config"] = rest.ScalarQuantization(
+                scalar=rest.ScalarQuantizationConfig(
+                    type=rest.ScalarType.INT8, always_ram=True
+                )
+            )
+        else:
+            logger.warning(
+                f"`int8` precision is not supported for {credentials.type.value}, "
+                "storing float32 vectors"
+            )
+
     return service(
         index_name=index_name,
         dimension=dimensions,
         credentials=dict(credentials.config),
         encoder=encoder,
+        **kwargs,
     )
@@ -1,5 +1,6 @@
 from typing import List
 
+import numpy as np
 from astrapy.db import AstraDB
 from semantic_router.encoders import BaseEncoder
 from tqdm import tqdm
@@ -41,15 +42,21 @@ class AstraService(BaseVectorDatabase):
         ]
         return docs
 
-    async def upsert(self, chunks: List[BaseDocumentChunk]) -> None:
+    async def upsert(
+        self, chunks: List[BaseDocumentChunk], embeddings: np.ndarray
+    ) -> None:
         documents = [
             {
                 "_id": chunk.id,
                 "text": chunk.content,
-                "$vector": chunk.dense_embedding,
+                "$vector": vector,
                 **chunk.metadata,
             }
-            for chunk in tqdm(chunks, desc="Upserting to Astra")
+            for chunk, vector in tqdm(
+                zip(chunks, embeddings.tolist()),
+                total=len(chunks),
+                desc="Upserting to Astra",
+            )
         ]
         for i in range(0, len(documents), 5):
             self.collection.insert_many(documents=documents[i : i + 5])
@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
 from typing import List
 
+import numpy as np
 from decouple import config
 from semantic_router.encoders import BaseEncoder
 from tqdm import tqdm
@@ -20,7 +21,8 @@ class BaseVectorDatabase(ABC):
         self.encoder = encoder
 
     @abstractmethod
-    async def upsert(self, chunks: List[BaseDocumentChunk]):
+    async def upsert(self, chunks: List[BaseDocumentChunk], embeddings: np.ndarray):
+        # `embeddings` is a (len(chunks), dimension) float32 array, row per chunk
         pass
 
     @abstractmethod
@@ -1,5 +1,8 @@
+import asyncio
 from typing import List
 
+import numpy as np
+from decouple import config
 from pinecone import Pinecone, ServerlessSpec
 from semantic_router.encoders import BaseEncoder
 from tqdm import tqdm
@@ -9,6 +12,8 @@ from models.document import BaseDocumentChunk
 from utils.logger import logger
 from vectordbs.base import BaseVectorDatabase
 
+PINECONE_POOL_THREADS = config("PINECONE_POOL_THREADS", default=4, cast=int)
+
 
 class PineconeService(BaseVectorDatabase):
     def __init__(
@@ -30,23 +35,38 @@ class PineconeService(BaseVectorDatabase):
                     cloud=credentials["cloud"], region=credentials["region"]
                 ),
             )
-        self.index = pinecone.Index(name=self.index_name)
+        self.index = pinecone.Index(
+            name=self.index_name, pool_threads=PINECONE_POOL_THREADS
+        )
 
-    # TODO: add batch size
-    async def upsert(self, chunks: List[BaseDocumentChunk], batch_size: int = 100):
+    async def upsert(
+        self,
+        chunks: List[BaseDocumentChunk],
+        embeddings: np.ndarray,
+        batch_size: int = 100,
+    ):
         if self.index is None:
             raise ValueError(f"Pinecone index {self.index_name} is not initialized.")
         try:
-            # Prepare and upsert documents to Pinecone in batches
+            # Send the batches in parallel using the index thread pool
+            async_results = []
             for i in tqdm(range(0, len(chunks), batch_size)):
                 i_end = min(i + batch_size, len(chunks))
                 chunks_batch = chunks[i:i_end]
-                to_upsert = [chunk.to_vector_db() for chunk in chunks_batch]
-                self.index.upsert(vectors=to_upsert)
-                logger.info(f"Upserted {len(chunks_batch)} chunks into Pinecone")
+                to_upsert = [
+                    {**chunk.to_vector_db(), "values": values}
+                    for chunk, values in zip(chunks_batch, embeddings[i:i_end].tolist())
+                ]
+                async_results.append(
+                    self.index.upsert(vectors=to_upsert, async_req=True)
+                )
+            await asyncio.gather(
+                *[asyncio.to_thread(result.get) for result in async_results]
+            )
+            logger.info(f"Upserted {len(chunks)} chunks into Pinecone")
 
             # Check that we have all vectors in index
-            return self.index.describe_index_stats()
+            return await asyncio.to_thread(self.index.describe_index_stats)
         except Exception as e:
             logger.error(f"Error in embedding documents: {e}")
             raise
@@ -1,6 +1,8 @@
-from typing import List
+import asyncio
+from typing import Dict, List, Optional, Tuple
 
-from qdrant_client import QdrantClient
+import numpy as np
+from qdrant_client import AsyncQdrantClient
 from qdrant_client.http import models as rest
 from semantic_router.encoders import BaseEncoder
 from tqdm import tqdm
@@ -11,10 +13,40 @@ from vectordbs.base import BaseVectorDatabase
 
 MAX_QUERY_TOP_K = 5
 
+# One client (and gRPC channel) per host and key, reused across requests
+_clients: Dict[Tuple[str, str, bool], AsyncQdrantClient] = {}
+
+
+def get_client(*, host: str, api_key: str, prefer_grpc: bool) -> AsyncQdrantClient:
+    key = (host, api_key, prefer_grpc)
+    if key not in _clients:
+        _clients[key] = AsyncQdrantClient(
+            url=host, api_key=api_key, https=True, prefer_grpc=prefer_grpc
+        )
+    return _clients[key]
+
+
+async def close_clients() -> None:
+    for client in _clients.values():
+        await client.close()
+    _clients.clear()
+
 
 class QdrantService(BaseVectorDatabase):
+    """
+    Reads and writes go through a shared `AsyncQdrantClient` over gRPC, which
+    needs the host to expose the gRPC port (6334). Set `prefer_grpc: false` in
+    the credentials to fall back to REST. The collection is created lazily, once
+    per service, before the first upsert, query or delete.
+    """
+
     def __init__(
-        self, index_name: str, dimension: int, credentials: dict, encoder: BaseEncoder
+        self,
+        index_name: str,
+        dimension: int,
+        credentials: dict,
+        encoder: BaseEncoder,
+        quantization_config: Optional[rest.QuantizationConfig] = None,
     ):
         super().__init__(
             index_name=index_name,
@@ -22,22 +54,34 @@ class QdrantService(BaseVectorDatabase):
             credentials=credentials,
             encoder=encoder,
         )
-        self.client = QdrantClient(
-            url=credentials["host"], api_key=credentials["api_key"], https=True
+        self.client = get_client(
+            host=credentials["host"],
+            api_key=credentials["api_key"],
+            prefer_grpc=credentials.get("prefer_grpc", True),
         )
-        collections = self.client.get_collections()
-        if index_name not in [c.name for c in collections.collections]:
-            self.client.create_collection(
-                collection_name=self.index_name,
-                vectors_config={
-                    "content": rest.VectorParams(
-                        size=dimension, distance=rest.Distance.COSINE
-                    )
-                },
-                optimizers_config=rest.OptimizersConfigDiff(
-                    indexing_threshold=0,
-                ),
-            )
+        self.quantization_config = quantization_config
+        self._collection_ready = False
+        self._collection_lock = asyncio.Lock()
+
+    async def _ensure_collection(self) -> None:
+        async with self._collection_lock:
+            if self._collection_ready:
+                return
+            collections = await self.client.get_collections()
+            if self.index_name not in [c.name for c in collections.collections]:
+                await self.client.create_collection(
+                    collection_name=self.index_name,
+                    vectors_config={
+                        "content": rest.VectorParams(
+                            size=self.dimension, distance=rest.Distance.COSINE
+                        )
+                    },
+                    optimizers_config=rest.OptimizersConfigDiff(
+                        indexing_threshold=0,
+                    ),
+                    quantization_config=self.quantization_config,
+                )
+            self._collection_ready = True
 
     # TODO: remove this
     async def convert_to_rerank_format(self, chunks: List[rest.PointStruct]):
@@ -51,27 +95,33 @@ class QdrantService(BaseVectorDatabase):
         ]
         return docs
 
-    async def upsert(self, chunks: List[BaseDocumentChunk]) -> None:
-        points = []
-        for chunk in tqdm(chunks, desc="Upserting to Qdrant"):
-            points.append(
-                rest.PointStruct(
-                    id=chunk.id,
-                    vector={"content": chunk.dense_embedding},
-                    payload={
-                        "document_id": chunk.document_id,
-                        "content": chunk.content,
-                        "doc_url": chunk.doc_url,
-                        **(chunk.metadata if chunk.metadata else {}),
-                    },
-                )
-            )
+    async def upsert(
+        self, chunks: List[BaseDocumentChunk], embeddings: np.ndarray
+    ) -> None:
+        await self._ensure_collection()
+        # Columnar batch, vectors are converted in one call instead of per point
+        points = rest.Batch(
+            ids=[chunk.id for chunk in chunks],
+            vectors={"content": embeddings.tolist()},
+            payloads=[
+                {
+                    "document_id": chunk.document_id,
+                    "content": chunk.content,
+                    "doc_url": chunk.doc_url,
+                    **(chunk.metadata if chunk.metadata else {}),
+                }
+                for chunk in tqdm(chunks, desc="Upserting to Qdrant")
+            ],
+        )
 
-        self.client.upsert(collection_name=self.index_name, wait=True, points=points)
+        await self.client.upsert(
+            collection_name=self.index_name, wait=True, points=points
+        )
 
     async def query(self, input: str, top_k: int = MAX_QUERY_TOP_K) -> List:
+        await self._ensure_collection()
         vectors = await self._generate_vectors(input=input)
-        search_result = self.client.search(
+        search_result = await self.client.search(
             collection_name=self.index_name,
             query_vector=("content", vectors[0]),
             limit=top_k,
@@ -102,7 +152,8 @@ class QdrantService(BaseVectorDatabase):
         #     exact=True,
         # )
 
-        deleted_chunks = self.client.count(
+        await self._ensure_collection()
+        deleted_chunks = await self.client.count(
             collection_name=self.index_name,
             count_filter=rest.Filter(
                 must=[
@@ -114,7 +165,7 @@ class QdrantService(BaseVectorDatabase):
             exact=True,
         )
 
-        self.client.delete(
+        await self.client.delete(
             collection_name=self.index_name,
             points_selector=rest.FilterSelector(
                 filter=rest.Filter(
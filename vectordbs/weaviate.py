@@ -1,6 +1,7 @@
 import uuid
 from typing import List
 
+import numpy as np
 import weaviate
 from semantic_router.encoders import BaseEncoder
 from tqdm import tqdm
@@ -41,7 +42,9 @@ class WeaviateService(BaseVectorDatabase):
             self.client.schema.create_class(schema)
 
     # TODO: add response model
-    async def upsert(self, chunks: List[BaseDocumentChunk]) -> None:
+    async def upsert(
+        self, chunks: List[BaseDocumentChunk], embeddings: np.ndarray
+    ) -> None:
         if not self.client:
             raise ValueError("Weaviate client is not initialized.")
 
@@ -55,8 +58,10 @@ class WeaviateService(BaseVectorDatabase):
         )
 
         with self.client.batch as batch:
-            for chunk in tqdm(
-                chunks, desc=f"Upserting to Weaviate index {self.index_name}"
+            for chunk, vector in tqdm(
+                zip(chunks, embeddings.tolist()),
+                total=len(chunks),
+                desc=f"Upserting to Weaviate index {self.index_name}",
             ):
                 vector_data = {
                     "uuid": chunk.id,
@@ -67,7 +72,7 @@ class WeaviateService(BaseVectorDatabase):
                         **(chunk.metadata if chunk.metadata else {}),
                     },
                     "class_name": self.index_name,
-                    "vector": chunk.dense_embedding,
+                    "vector": vector,
                 }
                 batch.add_data_object(**vector_data)
             batch.flush()